@@ -0,0 +1,201 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import matplotlib
+
+# die Skripte werden nur importiert, ihre Animation startet nicht
+matplotlib.use("Agg")
+import numpy as np
+
+from filament_engine import FilamentEnsemble
+from sim_2 import compute_blockwise_nematic_order
+
+# Headless-Benchmark der drei Filament-Varianten über N und Dichte:
+#   Schritte pro Sekunde, Spitzen-Speicher (tracemalloc) und ms pro Aufruf
+#   für jeden Teilkernel (Nachbarsuche, Alignment, Sliding, Kette, ...,
+#   blockweise Ordnung). Die Dichte ρ [Filamente / µm²] wird über die
+#   Boxgröße eingestellt, Parameter sonst wie im jeweiligen Skript.
+# Beispiele:
+#   python benchmark.py --quick
+#   python benchmark.py --save-baseline     # neue Referenz speichern
+#   python benchmark.py --compare           # gegen die Referenz prüfen
+
+VARIANTS = ("cyano_sim", "umwelt", "sim_2")
+N_VALUES = (50, 200, 1000, 5000, 20000, 50000)
+QUICK_N_VALUES = (50, 200, 1000)
+DENSITIES = (0.005, 0.02, 0.05)
+BASELINE = "benchmark_baseline.json"
+# ab welcher Verschlechterung (relativ) ein Fall als Regression gilt
+TOLERANCE = 0.25
+
+
+def make_case(variant, N, density, seed=0):
+    params = importlib.import_module(variant).ensemble_params()
+    params["domain_size"] = float(np.sqrt(N / density))
+    ensemble = FilamentEnsemble(N, rng=seed, **params)
+    # Köpfe gleichmäßig über die ganze Box verteilen: der Randabstand beim
+    # Erzeugen würde kleine Boxen sonst dichter packen als ρ
+    heads = np.random.default_rng(seed).random((N, 2)) * ensemble.domain_size
+    ensemble.points += (heads - ensemble.points[:, 0])[:, None, :]
+    return ensemble
+
+
+def run_case(variant, N, density, time_budget=2.0, max_steps=200, seed=0):
+    ensemble = make_case(variant, N, density, seed)
+    for _ in range(3):
+        ensemble.step()
+
+    ensemble.timer.enabled = True
+    steps = 0
+    start = time.perf_counter()
+    while steps < max_steps and (
+        steps < 3 or time.perf_counter() - start < time_budget
+    ):
+        ensemble.step()
+        with ensemble.timer("blockwise_order"):
+            compute_blockwise_nematic_order(
+                ensemble.theta, ensemble.heads, size=ensemble.domain_size
+            )
+        steps += 1
+    elapsed = time.perf_counter() - start
+    kernels = {
+        name: 1e3 * entry["total_s"] / entry["calls"]
+        for name, entry in ensemble.timer.to_dict().items()
+    }
+
+    # Speicher getrennt messen, tracemalloc bremst die Zeitmessung; genauso
+    # viele Schritte wie oben, damit Bindungen und Verlet-Listen mitwachsen
+    tracemalloc.start()
+    ensemble = make_case(variant, N, density, seed)
+    for _ in range(3 + steps):
+        ensemble.step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return dict(
+        variant=variant,
+        N=N,
+        density=density,
+        domain_size=ensemble.domain_size,
+        steps=steps,
+        steps_per_s=steps / elapsed,
+        peak_mb=peak / 2**20,
+        kernels_ms=kernels,
+    )
+
+
+def machine_info():
+    return dict(
+        platform=platform.platform(),
+        processor=platform.processor(),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        cpus=os.cpu_count(),
+    )
+
+
+def case_key(case):
+    return case["variant"], case["N"], case["density"]
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Vergleicht mit einer gespeicherten Referenz, gibt die Regressionen zurück."""
+    reference = {case_key(case): case for case in baseline["results"]}
+    regressions = []
+    for case in results:
+        old = reference.get(case_key(case))
+        if old is None:
+            continue
+        speed = case["steps_per_s"] / old["steps_per_s"]
+        memory = case["peak_mb"] / old["peak_mb"]
+        case["speed_vs_baseline"] = speed
+        case["memory_vs_baseline"] = memory
+        if speed < 1 - tolerance or memory > 1 + tolerance:
+            regressions.append(case)
+    return regressions
+
+
+def format_table(results):
+    kernels = list(dict.fromkeys(k for case in results for k in case["kernels_ms"]))
+    header = f"{'Variante':<10}{'N':>7}{'ρ':>7}{'Schritte/s':>12}{'MB':>8}"
+    header += "".join(f"{name[:11]:>12}" for name in kernels)
+    if any("speed_vs_baseline" in case for case in results):
+        header += f"{'vs. Ref.':>10}"
+    lines = [header, f"{'':<44}" + "".join(f"{'[ms]':>12}" for _ in kernels)]
+    for case in results:
+        line = (
+            f"{case['variant']:<10}{case['N']:>7}{case['density']:>7.3f}"
+            f"{case['steps_per_s']:>12.1f}{case['peak_mb']:>8.1f}"
+        )
+        line += "".join(
+            f"{case['kernels_ms'].get(name, np.nan):>12.3f}" for name in kernels
+        )
+        if "speed_vs_baseline" in case:
+            line += f"{case['speed_vs_baseline']:>9.2f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark der Filament-Simulationen")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=VARIANTS)
+    parser.add_argument("--n", nargs="+", type=int, default=None)
+    parser.add_argument("--densities", nargs="+", type=float, default=DENSITIES)
+    parser.add_argument(
+        "--quick", action="store_true", help=f"nur N = {QUICK_N_VALUES}"
+    )
+    parser.add_argument(
+        "--time-budget", type=float, default=2.0, help="Sekunden pro Fall"
+    )
+    parser.add_argument("--max-steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Ergebnisse als JSON speichern")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE, default=None)
+    parser.add_argument("--compare", nargs="?", const=BASELINE, default=None)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    N_values = args.n or (QUICK_N_VALUES if args.quick else N_VALUES)
+    results = []
+    for variant in args.variants:
+        for N in N_values:
+            for density in args.densities:
+                case = run_case(
+                    variant, N, density, args.time_budget, args.max_steps, args.seed
+                )
+                results.append(case)
+                print(
+                    f"{variant} N = {N} ρ = {density}: "
+                    f"{case['steps_per_s']:.1f} Schritte/s, {case['peak_mb']:.1f} MB",
+                    flush=True,
+                )
+
+    report = dict(machine=machine_info(), results=results)
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+    print()
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Referenz gespeichert: {args.save_baseline}")
+    if regressions:
+        print(f"\n{len(regressions)} Regression(en) gegenüber {args.compare}:")
+        for case in regressions:
+            print(
+                f"  {case['variant']} N = {case['N']} ρ = {case['density']}: "
+                f"{case['speed_vs_baseline']:.2f}x Geschwindigkeit, "
+                f"{case['memory_vs_baseline']:.2f}x Speicher"
+            )
+        raise SystemExit(1)
@@ -0,0 +1,580 @@
+import heapq
+import json
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
+
+from timing import PhaseTimer
+
+# Gemeinsame Physik für cyano_sim.py, umwelt.py und sim_2.py.
+# Alle Filamente liegen in zusammenhängenden Arrays:
+#   points   (N, n_segments, 2)
+#   theta, smoothed_theta, polarity   (N,)
+#   reversal_times                    (N,)   nächste Umkehr (absolute Zeit)
+#   bonds    (M, 3)   Sliding-Bindungen als Zeilen (i, j, Richtung)
+# und werden in einem vektorisierten Schritt bewegt.
+
+# bei jeder Änderung, die Ergebnisse verändert, hochzählen: damit werden
+# zwischengespeicherte Sweep-Ergebnisse (sim_2.py) ungültig. Das gilt auch
+# für die Mittelung und Abbruchlogik in online_stats.py, deren Parameter
+# schon im Cache-Schlüssel stehen
+ENGINE_VERSION = 1
+
+v0_mean = 3.0
+tau = 470
+delta_kappa = 340
+
+PARAMS = dict(
+    v0=v0_mean,
+    D_omega=(v0_mean * delta_kappa) ** 2 / tau,
+    reversal_rate=0.01,
+    dt=0.2,
+    domain_size=100,
+    n_segments=30,
+    filament_length=15,
+    # "bending" wie in cyano_sim, "relax" wie in umwelt.py / sim_2.py
+    chain="bending",
+    bending_stiffness=0.99,
+    # 0.2 wie in cyano_sim, 1.0 = keine Glättung der Laufrichtung
+    heading_smoothing=0.2,
+    alignment_strength=0.02,
+    slide_probability=0.04,
+    slide_distance=3.0,
+    slide_velocity=1.5,
+    # Ablöserate der Sliding-Bindungen (1/Zeit), 0 = Bindungen halten ewig
+    slide_detach_rate=0.0,
+    angle_parallel_threshold=np.pi / 4,
+    angle_antiparallel_threshold=3 * np.pi / 4,
+    # "cells" = mitlaufende Zellliste, "kdtree" = cKDTree pro Frame
+    neighbor_search="cells",
+    # "walls" = harte Wände, "periodic" = periodische Box
+    boundary="walls",
+    # > 0: Verlet-Listen mit Radius slide_distance + verlet_skin
+    verlet_skin=0.0,
+)
+
+
+def _norm(vectors):
+    return np.hypot(vectors[..., 0], vectors[..., 1])
+
+
+def follow_the_leader(points, segment_length, bending_stiffness=0.0):
+    """Kettenbedingung aus cyano_sim, in-place für points der Form (..., n_segments, 2).
+
+    Beide alten Durchläufe (Segmentlänge, dann Biegesteifigkeit) laufen in
+    einer Schleife entlang der Kette; alle Filamente werden pro Segment
+    gemeinsam behandelt.
+    """
+    # Position des Vorgängers nach dem ersten Durchlauf
+    lead = points[..., 0, :].copy()
+    prev_direction = None
+    for i in range(1, points.shape[-2]):
+        direction = lead - points[..., i, :]
+        distance = _norm(direction)[..., None]
+        ok = distance > 1e-8
+        lead = np.where(
+            ok,
+            lead - segment_length * direction / np.where(ok, distance, 1),
+            points[..., i, :],
+        )
+
+        direction = points[..., i - 1, :] - lead
+        distance = _norm(direction)[..., None]
+        direction = np.where(
+            distance > 1e-8,
+            direction / np.where(distance > 1e-8, distance, 1),
+            direction,
+        )
+        if prev_direction is not None and bending_stiffness > 0:
+            # prev_direction ist schon normiert (Segment i-1 hat genau segment_length)
+            blended = (
+                bending_stiffness * prev_direction + (1 - bending_stiffness) * direction
+            )
+            norm = _norm(blended)[..., None]
+            direction = np.where(
+                norm > 1e-8, blended / np.where(norm > 1e-8, norm, 1), direction
+            )
+        points[..., i, :] = points[..., i - 1, :] - segment_length * direction
+        prev_direction = direction
+    return points
+
+
+def relax_chain(points, segment_length):
+    """Kettenbedingung aus umwelt.py / sim_2.py: jedes Segment geht halb auf Sollabstand."""
+    for i in range(1, points.shape[-2]):
+        vec = points[..., i, :] - points[..., i - 1, :]
+        dist = _norm(vec)[..., None]
+        ok = dist > 1e-8
+        points[..., i, :] -= np.where(
+            ok, 0.5 * (dist - segment_length) / np.where(ok, dist, 1) * vec, 0
+        )
+    return points
+
+
+def minimum_image(d, box_size=None):
+    if box_size is None:
+        return d
+    return d - box_size * np.round(d / box_size)
+
+
+def pairs_to_csr(pairs, n):
+    """Paare (M, 2) -> symmetrische Nachbarliste (indptr, indices) im CSR-Format."""
+    rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    cols = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    order = np.argsort(rows * n + cols)
+    indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order].astype(np.intp)
+
+
+def neighbor_lists(positions, r, box_size=None, replicas=1):
+    # ein einziger Baum-Aufruf pro Frame statt query_ball_point pro Filament;
+    # Replikas liegen in einer dritten Koordinate 2r auseinander (auch über
+    # den periodischen Rand), damit reicht ein Baum für alle
+    if replicas > 1:
+        layer = np.repeat(np.arange(replicas) * 2.0 * r, len(positions) // replicas)
+        positions = np.column_stack([positions, layer])
+        if box_size is not None:
+            box_size = [box_size, box_size, replicas * 2.0 * r]
+    tree = cKDTree(positions, boxsize=box_size)
+    pairs = tree.query_pairs(r, output_type="ndarray")
+    return pairs_to_csr(pairs, len(positions))
+
+
+def filter_neighbor_lists(lists, positions, r, box_size=None):
+    """Verkleinert eine CSR-Nachbarliste auf die Paare mit Abstand <= r."""
+    indptr, indices = lists
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    d = minimum_image(positions[indices] - positions[rows], box_size)
+    keep = d[:, 0] ** 2 + d[:, 1] ** 2 <= r**2
+    kept = np.concatenate([[0], np.cumsum(keep)])
+    return kept[indptr], indices[keep]
+
+
+# halbe Nachbarschaft: jedes Zellpaar wird nur einmal angeschaut
+_HALF_STENCIL = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class CellList:
+    """Gleichmäßiges Gitter mit Zellen >= r über [0, domain_size]².
+
+    Die Filamente bleiben nach Zelle sortiert (order, cell_start). Pro Frame
+    wechseln nur wenige Köpfe die Zelle, deshalb wird die alte Reihenfolge
+    nur nachsortiert (Timsort auf fast sortierten Daten ist linear) statt
+    jedes Mal einen Baum neu aufzubauen. Mit periodic=True sind die
+    Randzellen Nachbarn und Abstände gelten im minimum image. Mit replicas=R
+    bekommt jede Replika (je n / R aufeinanderfolgende Filamente) ihr eigenes
+    Gitter im selben Zell-Array, eine Suche deckt alle ab.
+    """
+
+    def __init__(self, domain_size, r, n, periodic=False, replicas=1):
+        self.r = r
+        self.n_side = max(1, int(domain_size // r))
+        if periodic and self.n_side < 3:
+            raise ValueError(
+                "periodische Zellliste braucht mindestens 3 Zellen pro Seite"
+            )
+        self.cell_size = domain_size / self.n_side
+        self.box_size = domain_size if periodic else None
+        self.cell = np.full(n, -1, dtype=np.intp)
+        self.order = np.arange(n, dtype=np.intp)
+        # erste Zelle des Gitters der eigenen Replika
+        self.base = np.repeat(np.arange(replicas) * self.n_side**2, n // replicas)
+        self.cell_start = np.zeros(replicas * self.n_side**2 + 1, dtype=np.intp)
+        self._ij = np.empty((n, 2), dtype=np.intp)
+
+    def update(self, positions):
+        ij = self._ij
+        np.floor_divide(positions, self.cell_size, out=ij, casting="unsafe")
+        np.clip(ij, 0, self.n_side - 1, out=ij)
+        cell = self.base + ij[:, 0] * self.n_side + ij[:, 1]
+        if np.array_equal(cell, self.cell):
+            return 0
+        moved = np.count_nonzero(cell != self.cell)
+        self.cell = cell
+        self.order = self.order[np.argsort(cell[self.order], kind="stable")]
+        counts = np.bincount(cell, minlength=len(self.cell_start) - 1)
+        np.cumsum(counts, out=self.cell_start[1:])
+        return moved
+
+    def pairs(self, positions):
+        # Kandidaten aus Nachbarzellen, danach echter Abstandstest
+        n_side = self.n_side
+        cx, cy = self._ij[:, 0], self._ij[:, 1]
+        found = []
+        for dx, dy in _HALF_STENCIL:
+            nx, ny = cx + dx, cy + dy
+            if self.box_size is not None:
+                nx, ny = nx % n_side, ny % n_side
+            valid = (nx >= 0) & (nx < n_side) & (ny >= 0) & (ny < n_side)
+            i = np.flatnonzero(valid)
+            other = self.base[i] + nx[valid] * n_side + ny[valid]
+            first = self.cell_start[other]
+            count = self.cell_start[other + 1] - first
+            total = count.sum()
+            if total == 0:
+                continue
+            ii = np.repeat(i, count)
+            within = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+            jj = self.order[np.repeat(first, count) + within]
+            keep = ii < jj if (dx, dy) == (0, 0) else ii != jj
+            ii, jj = ii[keep], jj[keep]
+            d = minimum_image(positions[jj] - positions[ii], self.box_size)
+            close = d[:, 0] ** 2 + d[:, 1] ** 2 <= self.r**2
+            found.append(np.stack([ii[close], jj[close]], axis=-1))
+        if not found:
+            return np.empty((0, 2), dtype=np.intp)
+        return np.concatenate(found)
+
+    def neighbor_lists(self, positions):
+        self.update(positions)
+        return pairs_to_csr(self.pairs(positions), len(positions))
+
+
+def lebwohl_lasher_forces(theta, indptr, indices):
+    """Lebwohl-Lasher-Drehmoment 2 <sin 2(θi - θj)>_j aller Filamente (CSR-Liste).
+
+    sin(2(θi - θj)) = sin 2θi cos 2θj - cos 2θi sin 2θj, die Summen über j
+    sind damit zwei Sparse-Matrix-Vektor-Produkte.
+    """
+    n = len(theta)
+    degree = np.diff(indptr)
+    adjacency = csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n, n))
+    cos2, sin2 = np.cos(2 * theta), np.sin(2 * theta)
+    total = sin2 * (adjacency @ cos2) - cos2 * (adjacency @ sin2)
+    return 2 * np.divide(total, degree, out=np.zeros(n), where=degree > 0)
+
+
+class RandomStreams:
+    """Zieht die Zufallszahlen für viele Schritte auf einmal aus einem Generator.
+
+    Das Rotationsrauschen braucht pro Schritt genau n Werte, die kommen aus
+    Blöcken für `block_steps` Schritte. Variable Mengen (Sliding-Versuche,
+    Ablösen, Umkehrzeiten) kommen aus einem Vorrat gleichverteilter Zahlen.
+    """
+
+    def __init__(self, rng, n, block_steps=16):
+        self.rng = rng
+        self.n = n
+        self.block_steps = block_steps
+        self.normals = np.empty((0, n))
+        self.row = 0
+        self.pool = np.empty(0)
+        self.pool_pos = 0
+
+    def noise(self):
+        if self.row == len(self.normals):
+            self.normals = self.rng.standard_normal((self.block_steps, self.n))
+            self.row = 0
+        self.row += 1
+        return self.normals[self.row - 1]
+
+    def uniform(self, m):
+        if self.pool_pos + m > len(self.pool):
+            fresh = self.rng.random(max(m, self.block_steps * self.n))
+            self.pool = np.concatenate([self.pool[self.pool_pos :], fresh])
+            self.pool_pos = 0
+        self.pool_pos += m
+        return self.pool[self.pool_pos - m : self.pool_pos]
+
+    def state_arrays(self):
+        # nur die noch nicht verbrauchten Werte
+        return dict(
+            random_normals=self.normals[self.row :],
+            random_pool=self.pool[self.pool_pos :],
+        )
+
+    def load_state_arrays(self, data):
+        self.normals = data["random_normals"].copy()
+        self.pool = data["random_pool"].copy()
+        self.row = self.pool_pos = 0
+
+
+class FilamentEnsemble:
+    """Alle Filamente als Structure-of-Arrays, `step()` bewegt die ganze Population.
+
+    Mit replicas=R werden R unabhängige Systeme zu je n Filamenten gemeinsam
+    gerechnet; `per_replica()` liefert die (R, n, ...)-Sicht auf den Zustand.
+    """
+
+    def __init__(self, n, rng=None, replicas=1, **params):
+        unknown = set(params) - set(PARAMS)
+        if unknown:
+            raise TypeError(f"unbekannte Parameter: {sorted(unknown)}")
+        self.params = {**PARAMS, **params}
+        for key, value in self.params.items():
+            setattr(self, key, value)
+        self.segment_length = self.filament_length / self.n_segments
+        self.box_size = self.domain_size if self.boundary == "periodic" else None
+        self.rng = np.random.default_rng(rng)
+        # R unabhängige Systeme mit je N Filamenten liegen hintereinander in
+        # denselben Arrays (Replika k = Filamente k*N ... (k+1)*N - 1)
+        self.replicas = replicas
+        self.n_per_replica = n
+        self.n = n = n * replicas
+
+        self.random = RandomStreams(self.rng, n)
+
+        self.theta = self.rng.uniform(0, 2 * np.pi, n)
+        self.smoothed_theta = self.theta.copy()
+        self.polarity = np.ones(n)
+        # Umkehrungen als Ereignisse: exponentialverteilte Wartezeiten, die
+        # fälligen holt step() aus einem Heap statt N Würfe pro Schritt
+        self.reversal_times = self.reversal_waits(n)
+        self.schedule_reversals()
+        # Köpfe mit Abstand zum Rand; in kleinen Boxen höchstens ein Viertel
+        # der Box, sonst wird der Bereich leer oder negativ
+        margin = min(self.filament_length + 5, self.domain_size / 4)
+        start = self.rng.random((n, 2)) * (self.domain_size - 2 * margin) + margin
+        direction = np.stack([np.cos(self.theta), np.sin(self.theta)], axis=-1)
+        offsets = np.arange(self.n_segments)[:, None] * self.segment_length
+        self.points = start[:, None, :] - offsets[None] * direction[:, None, :]
+
+        # Filament i gleitet an j entlang, Richtung +1 (parallel) / -1 (antiparallel);
+        # jedes Filament hat höchstens eine Bindung
+        self.bonds = np.empty((0, 3), dtype=np.intp)
+
+        self.cells = None  # eine CellList für alle Replikas
+        self.verlet = None
+        self.verlet_heads = None
+        # zählt jeden echten Nachbarsuchlauf, zum Einstellen von verlet_skin
+        self.neighbor_rebuilds = 0
+        self.step_count = 0
+        self.checkpoint_extra = None
+        # Zeitmessung pro Phase, standardmäßig aus (timer.enabled = True)
+        self.timer = PhaseTimer()
+
+    # Zustand, der für ein bitgenaues Weiterrechnen gespeichert werden muss
+    STATE_ARRAYS = (
+        "points",
+        "theta",
+        "smoothed_theta",
+        "polarity",
+        "reversal_times",
+        "bonds",
+    )
+
+    def save_checkpoint(self, path, extra=None):
+        # extra: JSON-fähige Zusatzdaten des Aufrufers (z.B. laufende Statistik),
+        # landen atomar im selben Checkpoint und nach dem Laden in checkpoint_extra
+        meta = dict(
+            n=self.n_per_replica,
+            replicas=self.replicas,
+            params=self.params,
+            rng=self.rng.bit_generator.state,
+            step_count=self.step_count,
+            neighbor_rebuilds=self.neighbor_rebuilds,
+            extra=extra,
+        )
+        arrays = {name: getattr(self, name) for name in self.STATE_ARRAYS}
+        arrays.update(self.random.state_arrays())
+        if self.verlet is not None:
+            arrays["verlet_indptr"], arrays["verlet_indices"] = self.verlet
+            arrays["verlet_heads"] = self.verlet_heads
+        # erst in eine temporäre Datei schreiben, damit ein Absturz mitten im
+        # Speichern nicht den letzten guten Checkpoint zerstört
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, meta=json.dumps(meta), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load_checkpoint(cls, path, **params):
+        """Lädt einen Checkpoint; params überschreiben Parameter (zum Abzweigen)."""
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            ensemble = cls(
+                meta["n"], replicas=meta["replicas"], **{**meta["params"], **params}
+            )
+            for name in cls.STATE_ARRAYS:
+                setattr(ensemble, name, data[name].copy())
+            ensemble.schedule_reversals()
+            # mit geänderten Parametern passt die alte Verlet-Liste nicht mehr
+            if "verlet_indptr" in data and not params:
+                ensemble.verlet = (data["verlet_indptr"], data["verlet_indices"])
+                ensemble.verlet_heads = data["verlet_heads"].copy()
+            random_state = {key: data[key] for key in data if key.startswith("random_")}
+        bit_generator = getattr(np.random, meta["rng"]["bit_generator"])()
+        bit_generator.state = meta["rng"]
+        ensemble.rng = np.random.Generator(bit_generator)
+        ensemble.random = RandomStreams(ensemble.rng, ensemble.n)
+        ensemble.random.load_state_arrays(random_state)
+        ensemble.step_count = meta["step_count"]
+        if "reversal_rate" in params:
+            # gedächtnislos: neue Rate = einfach neu auslosen
+            ensemble.reversal_times = ensemble.time + ensemble.reversal_waits(
+                ensemble.n
+            )
+            ensemble.schedule_reversals()
+        ensemble.neighbor_rebuilds = meta["neighbor_rebuilds"]
+        ensemble.checkpoint_extra = meta["extra"]
+        return ensemble
+
+    def per_replica(self, array):
+        """Sicht der Form (R, N, ...) auf ein Array der Länge R*N."""
+        return array.reshape(self.replicas, self.n_per_replica, *array.shape[1:])
+
+    @property
+    def time(self):
+        return self.step_count * self.dt
+
+    def reversal_waits(self, m):
+        if self.reversal_rate <= 0:
+            return np.full(m, np.inf)
+        return -np.log1p(-self.random.uniform(m)) / self.reversal_rate
+
+    def schedule_reversals(self):
+        finite = np.flatnonzero(np.isfinite(self.reversal_times))
+        self._reversal_queue = list(
+            zip(self.reversal_times[finite].tolist(), finite.tolist())
+        )
+        heapq.heapify(self._reversal_queue)
+
+    def due_reversals(self, until):
+        """Filamente, deren Umkehrzeit vor `until` liegt; werden neu eingeplant."""
+        queue = self._reversal_queue
+        due = []
+        while queue and queue[0][0] < until:
+            due.append(heapq.heappop(queue)[1])
+        due = np.array(due, dtype=np.intp)
+        if len(due):
+            self.reversal_times[due] += self.reversal_waits(len(due))
+            for t, i in zip(self.reversal_times[due].tolist(), due.tolist()):
+                heapq.heappush(queue, (t, i))
+        return due
+
+    @property
+    def heads(self):
+        return self.points[:, 0]
+
+    @property
+    def is_stuck(self):
+        stuck = np.zeros(self.n, dtype=bool)
+        stuck[self.bonds[:, 0]] = True
+        return stuck
+
+    def slide_velocities(self, indptr, indices):
+        if len(self.bonds) and self.slide_detach_rate > 0:
+            detach = (
+                self.random.uniform(len(self.bonds)) < self.slide_detach_rate * self.dt
+            )
+            self.bonds = self.bonds[~detach]
+
+        # neue Bindungen: alle Kandidatenpaare freier Filamente auf einmal.
+        # Wie bisher gewinnt pro Filament der erste Nachbar (in Listenreihenfolge),
+        # bei dem der Versuch klappt und der Winkel passt.
+        rows = np.repeat(np.arange(self.n), np.diff(indptr))
+        free = ~self.is_stuck[rows]
+        i, j = rows[free], indices[free]
+        attempt = self.random.uniform(len(i)) < self.slide_probability
+        dtheta = np.abs((self.theta[i] - self.theta[j] + np.pi) % (2 * np.pi) - np.pi)
+        direction = np.where(
+            dtheta < self.angle_parallel_threshold,
+            1,
+            np.where(dtheta > self.angle_antiparallel_threshold, -1, 0),
+        )
+        ok = attempt & (direction != 0)
+        i, j, direction = i[ok], j[ok], direction[ok]
+        first = np.unique(i, return_index=True)[1]
+        new = np.stack([i[first], j[first], direction[first]], axis=-1)
+        self.bonds = np.concatenate([self.bonds, new])
+
+        i, j, direction = self.bonds.T
+        move_dir = np.stack([np.cos(self.theta[j]), np.sin(self.theta[j])], axis=-1)
+        slide = np.zeros((self.n, 2))
+        np.add.at(slide, i, direction[:, None] * self.slide_velocity * move_dir)
+        return slide
+
+    def search_neighbors(self, r):
+        # eine Suche über alle Replikas, Paare gibt es nur innerhalb einer
+        self.neighbor_rebuilds += 1
+        if self.neighbor_search == "kdtree":
+            return neighbor_lists(self.heads, r, self.box_size, self.replicas)
+        if self.cells is None:
+            periodic = self.box_size is not None
+            self.cells = CellList(
+                self.domain_size, r, self.n, periodic, replicas=self.replicas
+            )
+        return self.cells.neighbor_lists(self.heads)
+
+    def neighbors(self):
+        if self.verlet_skin <= 0:
+            return self.search_neighbors(self.slide_distance)
+        # Verlet-Liste: erst neu bauen, wenn sich ein Kopf um mehr als die
+        # halbe Skin bewegt hat, dann kann kein Paar unbemerkt unter r kommen
+        if self.verlet is not None:
+            moved = _norm(minimum_image(self.heads - self.verlet_heads, self.box_size))
+            moved = moved.max()
+            if moved > 0.5 * self.verlet_skin:
+                self.verlet = None
+        if self.verlet is None:
+            self.verlet = self.search_neighbors(self.slide_distance + self.verlet_skin)
+            self.verlet_heads = self.heads.copy()
+        return filter_neighbor_lists(
+            self.verlet, self.heads, self.slide_distance, self.box_size
+        )
+
+    def step(self):
+        # Nachbarn, Alignment und Sliding werden alle aus dem Zustand zu
+        # Beginn des Schritts berechnet (früher sah jedes Filament schon die
+        # neuen Winkel der vor ihm aktualisierten Filamente).
+        with self.timer("neighbors"):
+            indptr, indices = self.neighbors()
+        with self.timer("alignment"):
+            torque = lebwohl_lasher_forces(self.theta, indptr, indices)
+        with self.timer("sliding"):
+            slide = self.slide_velocities(indptr, indices)
+        self.integrate(self.alignment_strength * torque, slide)
+        self.step_count += 1
+
+    def integrate(self, alignment_torque=0.0, slide_velocity=0.0):
+        with self.timer("integration"):
+            self.move_heads(alignment_torque, slide_velocity)
+        with self.timer("chain"):
+            self.constrain_chain()
+        with self.timer("boundary"):
+            if self.box_size is None:
+                self.reflect_if_out_of_bounds()
+            else:
+                self.wrap_periodic()
+
+    def move_heads(self, alignment_torque=0.0, slide_velocity=0.0):
+        self.polarity[self.due_reversals(self.time + self.dt)] *= -1
+        noise = np.sqrt(2 * self.D_omega * self.dt) * self.random.noise()
+        self.theta = (self.theta + noise + alignment_torque) % (2 * np.pi)
+
+        delta_theta = (self.theta - self.smoothed_theta + np.pi) % (2 * np.pi) - np.pi
+        self.smoothed_theta = (
+            self.smoothed_theta + self.heading_smoothing * delta_theta
+        ) % (2 * np.pi)
+        move_dir = np.stack(
+            [np.cos(self.smoothed_theta), np.sin(self.smoothed_theta)], axis=-1
+        )
+        self.points[:, 0] += (
+            self.v0 * self.polarity[:, None] * move_dir + slide_velocity
+        ) * self.dt
+
+    def constrain_chain(self):
+        if self.chain == "bending":
+            follow_the_leader(self.points, self.segment_length, self.bending_stiffness)
+        else:
+            relax_chain(self.points, self.segment_length)
+
+    def reflect_if_out_of_bounds(self):
+        head = self.points[:, 0]
+        left, right = head[:, 0] < 0, head[:, 0] > self.domain_size
+        self.theta[left | right] = np.pi - self.theta[left | right]
+        bottom, top = head[:, 1] < 0, head[:, 1] > self.domain_size
+        self.theta[bottom | top] = -self.theta[bottom | top]
+        self.theta %= 2 * np.pi
+        np.clip(head, 0, self.domain_size, out=head)
+
+    def wrap_periodic(self):
+        # ganzes Filament um Vielfache der Box verschieben, damit der Kopf in
+        # [0, domain_size) liegt; die Kette bleibt dabei zusammenhängend
+        shift = np.floor(self.heads / self.domain_size) * self.domain_size
+        self.points -= shift[:, None, :]
+        # Rundung kann genau domain_size liefern
+        edge = self.heads >= self.domain_size
+        self.points -= edge[:, None, :] * self.domain_size
@@ -0,0 +1,176 @@
+import threading
+import time
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
+from scipy.interpolate import make_smoothing_spline
+
+# Gemeinsames Zeichnen für cyano_sim.py und umwelt.py: alle Filamente stecken
+# in einer einzigen LineCollection statt in einer Line2D pro Filament. Pro
+# Frame wird nur das gestapelte Segment-Array ausgetauscht.
+# Da n_segments fest ist, ist auch das Glätten linear mit fester Matrix:
+# ein einziges Matrixprodukt für alle Filamente statt eines Fits pro Filament.
+
+FILAMENT_COLOR = (0.0, 0.6, 0.0, 0.4)
+
+
+def unwrap_and_plot(points, box_size):
+    """Macht (..., n_segments, 2)-Ketten über den periodischen Rand hinweg stetig."""
+    delta = np.diff(points, axis=-2)
+    delta = (delta + box_size / 2) % box_size - box_size / 2
+    return np.concatenate(
+        [points[..., :1, :], points[..., :1, :] + np.cumsum(delta, axis=-2)], axis=-2
+    )
+
+
+def moving_average_matrix(n, window=5):
+    if n < window:
+        return np.eye(n)
+    rows = np.arange(n - window + 1)[:, None]
+    cols = np.arange(n)[None, :]
+    return ((cols >= rows) & (cols < rows + window)) / window
+
+
+def spline_matrix(n, n_out=100, lam=1e-4):
+    """Glättender kubischer Spline über gleichmäßiges u, ausgewertet an n_out Stellen.
+
+    lam = 1e-4 entspricht für unsere Ketten etwa splprep(..., s=1).
+    """
+    u = np.linspace(0, 1, n)
+    return make_smoothing_spline(u, np.eye(n), lam=lam)(np.linspace(0, 1, n_out))
+
+
+class CurveSmoother:
+    """Wendet eine (n_out, n)-Matrix auf alle Filamente zugleich an."""
+
+    def __init__(self, matrix):
+        self.matrix = np.ascontiguousarray(matrix)
+
+    def __call__(self, points):
+        f, n, d = points.shape
+        # (n, F*2) damit das Ganze ein einziger GEMM-Aufruf ist
+        flat = np.ascontiguousarray(points.transpose(1, 0, 2)).reshape(n, f * d)
+        out = self.matrix @ flat
+        return out.reshape(-1, f, d).transpose(1, 0, 2)
+
+
+class FilamentRenderer:
+    """Ein Artist für alle Filamente; Farben werden nur bei Änderung neu gesetzt."""
+
+    def __init__(self, ax, n, color=FILAMENT_COLOR, lw=2):
+        self.n = n
+        self.collection = LineCollection(np.zeros((n, 2, 2)), linewidths=lw)
+        self.colors = None
+        self.set_colors(color)
+        ax.add_collection(self.collection, autolim=False)
+
+    def set_colors(self, colors):
+        colors = np.broadcast_to(to_rgba_array(colors), (self.n, 4))
+        if self.colors is not None and np.array_equal(colors, self.colors):
+            return
+        self.colors = colors.copy()
+        self.collection.set_color(self.colors)
+
+    def update(self, curves):
+        """curves: (n, m, 2) oder Liste von (m_i, 2)-Arrays."""
+        self.collection.set_segments(curves)
+        return self.collection
+
+
+class DrawTimer:
+    """Misst das Zeichnen, das FuncAnimation erst nach dem Callback erledigt.
+
+    Mit blit=True zeichnet die Animation die zurückgegebenen Artists nach
+    update() und blittet sie dann auf den Canvas. `mark()` am Ende von
+    update() aufrufen; die Zeit bis nach canvas.blit (bzw. bis zum
+    draw_event bei vollem Neuzeichnen) wird als `name` verbucht.
+    """
+
+    def __init__(self, canvas, timer, name="drawing"):
+        self.timer = timer
+        self.name = name
+        self.start = None
+        blit = canvas.blit
+
+        def timed_blit(*args, **kwargs):
+            blit(*args, **kwargs)
+            self.stop()
+
+        canvas.blit = timed_blit
+        canvas.mpl_connect("draw_event", lambda event: self.stop())
+
+    def mark(self):
+        if self.timer.enabled:
+            self.start = time.perf_counter()
+
+    def stop(self):
+        if self.start is not None:
+            self.timer.add(self.name, time.perf_counter() - self.start)
+            self.start = None
+
+
+class SimulationThread(threading.Thread):
+    """Rechnet das Ensemble im Hintergrund und stellt fertige Frames bereit.
+
+    Nach je `steps_per_frame` Schritten werden Punkte und Winkel in einen
+    freien Puffer kopiert und als neuester Frame veröffentlicht. Die Physik
+    rechnet höchstens einen Frame voraus: veröffentlicht wird erst, wenn
+    `latest()` den vorigen Frame abgeholt hat. Zwischen zwei angezeigten
+    Frames liegen so genau `steps_per_frame` Schritte, und die Anzeige
+    wartet trotzdem nie auf die Physik (drei Puffer: wird geschrieben /
+    bereit / wird gezeichnet).
+    """
+
+    def __init__(self, ensemble, steps_per_frame=1, visible=None):
+        super().__init__(daemon=True)
+        self.ensemble = ensemble
+        self.steps_per_frame = steps_per_frame
+        self.visible = slice(None, visible)
+        self.buffers = [
+            dict(
+                points=ensemble.points[self.visible].copy(),
+                theta=ensemble.theta.copy(),
+                step=ensemble.step_count,
+            )
+            for _ in range(3)
+        ]
+        self.writing, self.ready, self.reading = 0, 1, 2
+        self.version = self.read_version = 0
+        self.lock = threading.Lock()
+        self.taken = threading.Condition(self.lock)
+        self.stopping = threading.Event()
+
+    def publish(self):
+        buffer = self.buffers[self.writing]
+        np.copyto(buffer["points"], self.ensemble.points[self.visible])
+        np.copyto(buffer["theta"], self.ensemble.theta)
+        buffer["step"] = self.ensemble.step_count
+        with self.taken:
+            # warten, bis die Anzeige den vorigen Frame abgeholt hat
+            while self.version != self.read_version and not self.stopping.is_set():
+                self.taken.wait()
+            self.writing, self.ready = self.ready, self.writing
+            self.version += 1
+
+    def run(self):
+        while not self.stopping.is_set():
+            for _ in range(self.steps_per_frame):
+                self.ensemble.step()
+            self.publish()
+
+    def latest(self):
+        """Neuester fertiger Frame (dict mit points, theta, step)."""
+        with self.taken:
+            if self.version != self.read_version:
+                self.reading, self.ready = self.ready, self.reading
+                self.read_version = self.version
+                self.taken.notify()
+        return self.buffers[self.reading]
+
+    def stop(self):
+        self.stopping.set()
+        with self.taken:
+            self.taken.notify_all()
+        if self.is_alive():
+            self.join()
@@ -0,0 +1,159 @@
+import argparse
+import glob
+import importlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+# kein Display nötig, auch nicht in den Worker-Prozessen
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from filament_render import CurveSmoother, FilamentRenderer, unwrap_and_plot
+from trajectory import TrajectoryReader, TrajectoryRecorder
+
+# Headless-Film aus cyano_sim.py / umwelt.py:
+#   1. Simulation laufen lassen, jeder Frame wird als Trajektorie gestreamt
+#   2. Frames in Blöcken parallel auf einem Prozesspool als PNG rendern
+#   3. optional alles zu einem GIF zusammenkleben
+# Beispiel: python movie_export.py cyano_sim --frames 2000 --gif film.gif
+
+
+def record_movie(ensemble, path, frames, steps_per_frame=1, overwrite=False):
+    """Rechnet `frames` Frames und schreibt die vollen Ketten nach path.
+
+    Eine vorhandene Trajektorie wird nie fortgesetzt (sie stammt von einem
+    anderen Lauf); mit overwrite=True wird sie gelöscht, sonst gibt es einen
+    FileExistsError.
+    """
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(
+                f"{path} existiert schon; anderen --out wählen oder --overwrite"
+            )
+        shutil.rmtree(path)
+    with TrajectoryRecorder(path, ensemble, segment_stride=1) as recorder:
+        recorder.append(ensemble)
+        for _ in range(frames - 1):
+            for _ in range(steps_per_frame):
+                ensemble.step()
+            recorder.append(ensemble)
+
+
+def render_frames(path, out_dir, start, stop, smoothing, domain_size, dpi, title):
+    """Rendert die Frames start..stop-1; läuft in einem Worker-Prozess."""
+    reader = TrajectoryReader(path)
+    segments = reader.read("segments", start, stop).astype(float)
+    thetas = reader.read("theta", start, stop)
+    steps = reader.read("step", start, stop)
+    smooth = CurveSmoother(smoothing)
+
+    fig, ax = plt.subplots()
+    ax.set_xlim(0, domain_size)
+    ax.set_ylim(0, domain_size)
+    ax.set_aspect("equal")
+    ax.set_title(title)
+    renderer = FilamentRenderer(ax, segments.shape[1])
+    text = ax.text(5, 5, "", color="red")
+    files = []
+    for frame, (points, theta, step) in enumerate(zip(segments, thetas, steps)):
+        S = np.mean(np.cos(2 * theta))
+        text.set_text(f"Nemat. Ordnung S = {S:.2f}   Schritt {step}")
+        renderer.update(smooth(unwrap_and_plot(points, domain_size)))
+        file = os.path.join(out_dir, f"frame_{start + frame:05d}.png")
+        fig.savefig(file, dpi=dpi)
+        files.append(file)
+    plt.close(fig)
+    return files
+
+
+def render_movie(
+    path,
+    out_dir,
+    smoothing,
+    domain_size,
+    workers=None,
+    frames_per_task=25,
+    dpi=100,
+    title="",
+):
+    """Verteilt die Frames blockweise auf einen Prozesspool, gibt die PNGs zurück."""
+    os.makedirs(out_dir, exist_ok=True)
+    n_frames = len(TrajectoryReader(path))
+    starts = range(0, n_frames, frames_per_task)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                render_frames,
+                path,
+                out_dir,
+                start,
+                min(start + frames_per_task, n_frames),
+                smoothing,
+                domain_size,
+                dpi,
+                title,
+            )
+            for start in starts
+        ]
+        return [file for future in futures for file in future.result()]
+
+
+def write_gif(files, gif_path, fps=30):
+    from PIL import Image
+
+    frames = [Image.open(file) for file in files]
+    frames[0].save(
+        gif_path,
+        save_all=True,
+        append_images=frames[1:],
+        duration=1000 / fps,
+        loop=0,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filament-Film ohne Display rendern")
+    parser.add_argument("script", choices=["cyano_sim", "umwelt"])
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--steps-per-frame", type=int, default=1)
+    parser.add_argument("--out", default="movie")
+    parser.add_argument("--gif", default=None)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="vorhandene Trajektorie in --out löschen und neu rechnen",
+    )
+    args = parser.parse_args()
+
+    # die Skripte starten ihre Animation nur als __main__, hier wird nur
+    # das Ensemble und die Glättung übernommen
+    sim = importlib.import_module(args.script)
+    trajectory = os.path.join(args.out, "trajectory")
+    record_movie(
+        sim.ensemble, trajectory, args.frames, args.steps_per_frame, args.overwrite
+    )
+    print(f"{args.frames} Frames simuliert -> {trajectory}")
+    if args.overwrite:
+        # PNGs eines früheren, längeren Films nicht liegen lassen
+        for file in glob.glob(os.path.join(args.out, "frame_*.png")):
+            os.remove(file)
+    files = render_movie(
+        trajectory,
+        args.out,
+        sim.smooth_points.matrix,
+        sim.domain_size,
+        workers=args.workers,
+        dpi=args.dpi,
+        title=sim.ax.get_title(),
+    )
+    print(f"{len(files)} PNGs in {args.out}")
+    if args.gif:
+        write_gif(files, args.gif, args.fps)
+        print(f"GIF: {args.gif}")
@@ -0,0 +1,218 @@
+import numpy as np
+
+# Statistik für Zeitreihen wie S(t). BlockingAccumulator ist rein streamend:
+# nur ein paar Summen pro Blocking-Ebene, der Speicher wächst mit log(T).
+# EquilibrationMonitor braucht für MSER dagegen die ganze Reihe (eine Zahl
+# pro Probe), mittelt die Produktionsphase aber auch laufend.
+
+
+class BlockingAccumulator:
+    """Laufender Mittelwert/Varianz plus Fehlerbalken nach Flyvbjerg-Petersen.
+
+    Auf Ebene k werden Mittelwerte von Blöcken aus 2^k Werten gesammelt. Für
+    korrelierte Daten wächst der naive Fehler mit k, bis die Blöcke länger als
+    die Autokorrelationszeit sind; der größte Wert über die Ebenen mit genug
+    Blöcken ist die (konservative) Schätzung.
+    """
+
+    MIN_BLOCKS = 16
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        # pro Ebene: [Anzahl, Summe, Quadratsumme] der Blockmittel
+        self.levels = []
+        self.pending = []
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+
+        level, value = 0, x
+        while True:
+            if level == len(self.levels):
+                self.levels.append([0, 0.0, 0.0])
+                self.pending.append(None)
+            stats = self.levels[level]
+            stats[0] += 1
+            stats[1] += value
+            stats[2] += value * value
+            if self.pending[level] is None:
+                self.pending[level] = value
+                break
+            value = 0.5 * (self.pending[level] + value)
+            self.pending[level] = None
+            level += 1
+
+    @property
+    def variance(self):
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def error(self):
+        if self.n < 2:
+            return np.inf
+        errors = []
+        for count, total, total_sq in self.levels:
+            if count < self.MIN_BLOCKS:
+                break
+            var = max(total_sq / count - (total / count) ** 2, 0.0)
+            errors.append(np.sqrt(var / (count - 1)))
+        return max(errors) if errors else np.inf
+
+    @property
+    def autocorrelation_time(self):
+        # τ_int mit τ = 1/2 für unkorrelierte Werte (in Einheiten der Abtastung)
+        if self.variance == 0 or not np.isfinite(self.error):
+            return np.nan
+        return 0.5 * self.error**2 * self.n / self.variance
+
+    def to_dict(self):
+        return dict(
+            n=self.n,
+            mean=self.mean,
+            m2=self._m2,
+            levels=self.levels,
+            pending=self.pending,
+        )
+
+    @classmethod
+    def from_dict(cls, state):
+        acc = cls()
+        acc.n, acc.mean, acc._m2 = state["n"], state["mean"], state["m2"]
+        acc.levels, acc.pending = state["levels"], state["pending"]
+        return acc
+
+
+class EquilibrationMonitor:
+    """Erkennt das Ende der Einschwingphase und mittelt erst danach.
+
+    Alle `window` Proben wird die ganze bisherige Reihe per MSER-5 geprüft:
+    als Einschwingphase wird der Anfang gewählt, dessen Weglassen den
+    Standardfehler des Rests minimiert (auf Mitteln aus je `batch` Proben).
+    Liegt dieser Schnitt in der zweiten Hälfte der Reihe, gilt sie noch als
+    nicht eingeschwungen; `summary()` mittelt dann ersatzweise über die
+    zweite Hälfte der Reihe. `done` wird wahr, wenn außerdem
+      - die Produktionsphase mindestens `production_ratio` mal so lang wie
+        die Einschwingphase und mindestens `min_samples` lang ist,
+      - ihr linearer Trend über die ganze Länge höchstens `tolerance`
+        Standardfehler ausmacht (kein Rest-Drift) und
+      - ihr Fehlerbalken unter `target_error` liegt.
+    Solange der Schnitt gleich bleibt, kommen nur die neuen Proben in den
+    Accumulator der Produktionsphase.
+    """
+
+    def __init__(
+        self,
+        target_error=0.01,
+        window=20,
+        batch=5,
+        tolerance=2.0,
+        production_ratio=3.0,
+        min_samples=100,
+    ):
+        self.target_error = target_error
+        self.window = window
+        self.batch = batch
+        self.tolerance = tolerance
+        self.production_ratio = production_ratio
+        self.min_samples = min_samples
+        self.series = []
+        self.equilibrated_at = None
+        self.production = BlockingAccumulator()
+        self._production_start = 0
+        self.done = False
+
+    @property
+    def samples(self):
+        return len(self.series)
+
+    def add(self, x):
+        self.series.append(float(x))
+        if self.samples % self.window == 0:
+            self._check()
+        return self.done
+
+    def truncation(self):
+        """MSER-5: Anzahl Proben am Anfang, die weggelassen werden (None = zu früh)."""
+        k = self.samples // self.batch
+        if k < 4:
+            return None
+        y = np.reshape(self.series[: k * self.batch], (k, self.batch)).mean(axis=1)
+        # Summen über y[d:] für alle d auf einmal
+        rest = np.arange(k, 0, -1)
+        tail_sum = np.cumsum(y[::-1])[::-1]
+        tail_sq = np.cumsum(y[::-1] ** 2)[::-1]
+        mser = (tail_sq - tail_sum**2 / rest) / rest**2
+        d = int(np.argmin(mser[: k - 2]))
+        if d > k // 2:
+            return None
+        return d * self.batch
+
+    def _average_from(self, start):
+        # bei gleichem Start nur die neuen Proben nachtragen
+        if start != self._production_start:
+            self.production = BlockingAccumulator()
+            self._production_start = start
+        for x in self.series[start + self.production.n :]:
+            self.production.add(x)
+
+    def _check(self):
+        cut = self.truncation()
+        self.equilibrated_at = cut
+        self.done = False
+        if cut is None:
+            self._average_from(self.samples // 2)
+            return
+        self._average_from(cut)
+        production = self.series[cut:]
+        if len(production) < max(self.min_samples, self.production_ratio * cut):
+            return
+        # Änderung über die Produktionsphase laut Regressionsgerade; deren
+        # Standardfehler ist sqrt(12) x Fehler des Mittelwerts
+        t = np.arange(len(production)) - (len(production) - 1) / 2
+        slope = np.dot(t, production) / np.dot(t, t)
+        drift = abs(slope) * len(production)
+        spread = np.sqrt(12) * self.production.error
+        self.done = (
+            drift <= self.tolerance * spread
+            and self.production.error <= self.target_error
+        )
+
+    def summary(self):
+        return dict(
+            mean=self.production.mean if self.production.n else np.nan,
+            error=self.production.error,
+            tau=self.production.autocorrelation_time,
+            samples=self.production.n,
+            equilibrated_at=self.equilibrated_at,
+        )
+
+    def config(self):
+        # alles, was bestimmt, wann ein Lauf aufhört (für den Cache-Schlüssel in
+        # sim_2.py); Änderungen an der Logik selbst brauchen ein neues
+        # ENGINE_VERSION in filament_engine.py
+        return dict(
+            target_error=self.target_error,
+            window=self.window,
+            batch=self.batch,
+            tolerance=self.tolerance,
+            production_ratio=self.production_ratio,
+            min_samples=self.min_samples,
+            min_blocks=BlockingAccumulator.MIN_BLOCKS,
+        )
+
+    def to_dict(self):
+        return dict(series=self.series)
+
+    def load_dict(self, state):
+        self.series = list(state["series"])
+        self.equilibrated_at = None
+        self.production = BlockingAccumulator()
+        self._production_start = 0
+        self.done = False
+        if self.samples >= self.window:
+            self._check()
@@ -1,6 +1,17 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.spatial import cKDTree
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from scipy.stats import qmc
+from filament_engine import ENGINE_VERSION, PARAMS, FilamentEnsemble
+from trajectory import TrajectoryRecorder
+from online_stats import EquilibrationMonitor
+from timing import PhaseTimer
 
 # Simulationsparameter
 v0_mean = 3.0
@@ -11,135 +22,149 @@ dt = 0.2
 domain_size = 100  # µm
 n_segments = 30
 filament_length = 15
-segment_length = filament_length / n_segments
+# "walls" = harte Wände, "periodic" = periodische Box ohne Randeffekte
+BOUNDARY = "walls"
 
 # Sliding-Parameter
 SLIDE_PROBABILITY = 0.04
 SLIDE_DISTANCE = 3.0
 SLIDE_VELOCITY = 1.5
+SLIDE_DETACH_RATE = 0.0  # > 0: Bindungen lösen sich wieder, sonst klebt irgendwann alles
 ANGLE_PARALLEL_THRESHOLD = np.pi / 4
 ANGLE_ANTIPARALLEL_THRESHOLD = 3 * np.pi / 4
 
-
-class Filament:
-    def __init__(self):
-        self.v = v0_mean
-        self.theta = np.random.uniform(0, 2 * np.pi)
-        self.polarity = 1
-        self.reversal_rate = 0.01
-        dx, dy = np.cos(self.theta), np.sin(self.theta)
-        margin = filament_length + 5
-        start = np.random.rand(2) * (domain_size - 2 * margin) + margin
-        self.points = np.array([
-            start - i * segment_length * np.array([dx, dy])
-            for i in range(n_segments)
-        ])
-        self.is_stuck = False
-        self.stuck_to = None
-        self.stuck_direction = 0
-
-    def reflect_if_out_of_bounds(self):
-        x, y = self.points[0]
-        if x < 0:
-            x = 0
-            self.theta = np.pi - self.theta
-        elif x > domain_size:
-            x = domain_size
-            self.theta = np.pi - self.theta
-        if y < 0:
-            y = 0
-            self.theta = -self.theta
-        elif y > domain_size:
-            y = domain_size
-            self.theta = -self.theta
-        self.theta %= 2 * np.pi
-        self.points[0] = np.array([x, y])
-
-    def update(self, alignment_force=0, slide_velocity=np.array([0.0, 0.0])):
-        if np.random.rand() < self.reversal_rate * dt:
-            self.polarity *= -1
-        noise = np.sqrt(2 * D_omega * dt) * np.random.normal()
-        self.theta += noise + alignment_force
-        self.theta %= 2 * np.pi
-
-        move_dir = np.array([np.cos(self.theta), np.sin(self.theta)])
-        speed = self.v
-        self.points[0] += (speed * self.polarity * move_dir + slide_velocity) * dt
-
-        for i in range(1, n_segments):
-            vec = self.points[i] - self.points[i - 1]
-            dist = np.linalg.norm(vec)
-            if dist > 1e-8:
-                diff = (dist - segment_length) / dist * vec
-                self.points[i] -= 0.5 * diff
-
-        self.reflect_if_out_of_bounds()
-
-
-def lebwohl_lasher_force(theta_i, neighbors_theta):
-    if len(neighbors_theta) == 0:
-        return 0.0
-    diffs = theta_i - neighbors_theta
-    return 2 * np.mean(np.sin(2 * diffs))
-
-
-def calculate_slide_velocity(filament, neighbors):
-    slide_velocity = np.array([0.0, 0.0])
-    if filament.is_stuck:
-        other = filament.stuck_to
-        direction = filament.stuck_direction
-        move_dir = np.array([np.cos(other.theta), np.sin(other.theta)])
-        return direction * SLIDE_VELOCITY * move_dir
-
-    for other in neighbors:
-        if other is filament:
-            continue
-        vec = other.points[0] - filament.points[0]
-        dist = np.linalg.norm(vec)
-        if dist > SLIDE_DISTANCE:
-            continue
-        if np.random.rand() < SLIDE_PROBABILITY:
-            theta1 = filament.theta % (2 * np.pi)
-            theta2 = other.theta % (2 * np.pi)
-            dtheta = abs((theta1 - theta2 + np.pi) % (2 * np.pi) - np.pi)
-            if dtheta < ANGLE_PARALLEL_THRESHOLD:
-                direction = 1
-            elif dtheta > ANGLE_ANTIPARALLEL_THRESHOLD:
-                direction = -1
-            else:
-                continue
-            filament.is_stuck = True
-            filament.stuck_to = other
-            filament.stuck_direction = direction
-            move_dir = np.array([np.cos(other.theta), np.sin(other.theta)])
-            return direction * SLIDE_VELOCITY * move_dir
-    return slide_velocity
-
-
-def compute_blockwise_nematic_order(filaments, l=10):
-    thetas = np.array([f.theta for f in filaments])
-    positions = np.array([f.points[0] for f in filaments])
-    n_blocks = int(domain_size // l)
-    S_blocks = []
-
-    for i in range(n_blocks):
-        for j in range(n_blocks):
-            x_min, x_max = i * l, (i + 1) * l
-            y_min, y_max = j * l, (j + 1) * l
-            in_block = np.where(
-                (positions[:, 0] >= x_min) & (positions[:, 0] < x_max) &
-                (positions[:, 1] >= y_min) & (positions[:, 1] < y_max)
-            )[0]
-            if len(in_block) > 1:
-                block_thetas = thetas[in_block]
-                cos2 = np.cos(2 * block_thetas)
-                sin2 = np.sin(2 * block_thetas)
-                mean_cos = np.mean(cos2)
-                mean_sin = np.mean(sin2)
-                S_block = np.sqrt(mean_cos ** 2 + mean_sin ** 2)
-                S_blocks.append(S_block)
-
-    return np.mean(S_blocks) if S_blocks else 0.0
+# Nachbarlisten mit Radius SLIDE_DISTANCE + VERLET_SKIN, nur neu gebaut wenn nötig.
+# Aus: die Köpfe laufen 0.6-0.9 pro Schritt, mit Skin 2 wird trotzdem jeden
+# 2. Schritt neu gebaut, und Suche mit größerem Radius plus Filtern kostet mehr
+# als sie spart (100 Schritte, N = 5000: 4.5 s ohne, 9.0 s mit Skin 2;
+# N = 500: 0.23 s / 0.31 s). Zum Ausprobieren > 0 setzen, neighbor_rebuilds
+# im Ergebnis zählt die Neuaufbauten.
+VERLET_SKIN = 0.0
+
+# kleine Systeme: alle Wiederholungen als eine Replika-Achse in einem Job
+# rechnen, sonst frisst der Python-Overhead pro Schritt die Laufzeit
+BATCH_REPLICAS_BELOW = 200
+# ... in festen Gruppen zu so vielen Wiederholungen (jede Gruppe ist ein Job;
+# wird repeats erweitert, muss nur die letzte, unvollständige Gruppe neu gerechnet werden)
+BATCH_REPLICAS = 5
+
+# alle so viele Schritte den kompletten Zustand sichern (wenn checkpoint_dir gesetzt)
+CHECKPOINT_EVERY = 100
+
+# Trajektorie (wenn trajectory_dir gesetzt): jeden RECORD_EVERY-ten Schritt Köpfe
+# und Winkel, optional jedes RECORD_SEGMENT_STRIDE-te Segment
+RECORD_EVERY = 10
+RECORD_SEGMENT_STRIDE = None
+
+# S(t) alle SAMPLE_EVERY Schritte messen (kostet nur wenige Prozent eines
+# Schritts); ein Lauf endet vorzeitig, wenn das Zeitmittel nach der
+# Einschwingphase auf TARGET_ERROR genau ist. Die Produktionsphase muss dafür
+# mindestens MIN_SAMPLES Proben lang sein, bei kurzen Läufen höchstens die
+# Hälfte des Budgets.
+SAMPLE_EVERY = 2
+TARGET_ERROR = 0.01
+MIN_SAMPLES = 100
+
+# Blockgrößen für die Coarse-Graining-Kurve S(l) am Ende jedes Laufs
+BLOCK_SIZES = (5, 10, 20, 25, 50)
+
+# Ergebnisse pro Job landen unter einem Hash aller Parameter in CACHE_DIR;
+# ein erneuter oder erweiterter Sweep rechnet nur die fehlenden Punkte.
+# Funktioniert nur mit fester SEED (mit None ist jeder Lauf neu).
+SEED = 1
+CACHE_DIR = "sweep_cache"
+
+
+def ensemble_params():
+    return dict(
+        v0=v0_mean,
+        D_omega=D_omega,
+        dt=dt,
+        domain_size=domain_size,
+        n_segments=n_segments,
+        filament_length=filament_length,
+        chain="relax",
+        boundary=BOUNDARY,
+        heading_smoothing=1.0,
+        alignment_strength=0.02,
+        slide_probability=SLIDE_PROBABILITY,
+        slide_distance=SLIDE_DISTANCE,
+        slide_velocity=SLIDE_VELOCITY,
+        slide_detach_rate=SLIDE_DETACH_RATE,
+        angle_parallel_threshold=ANGLE_PARALLEL_THRESHOLD,
+        angle_antiparallel_threshold=ANGLE_ANTIPARALLEL_THRESHOLD,
+        verlet_skin=VERLET_SKIN,
+    )
+
+
+def make_ensemble(N, rng=None, replicas=1, **overrides):
+    return FilamentEnsemble(N, rng=rng, replicas=replicas, **{**ensemble_params(), **overrides})
+
+
+def make_monitor(steps):
+    min_samples = min(MIN_SAMPLES, steps // SAMPLE_EVERY // 2)
+    return EquilibrationMonitor(target_error=TARGET_ERROR, min_samples=min_samples)
+
+
+def job_key(N, reps, steps, block_size, seed, overrides=None):
+    # alles, was das Ergebnis eines Jobs bestimmt (auch nicht gesetzte Defaults)
+    content = dict(
+        params={**PARAMS, **ensemble_params(), **(overrides or {})},
+        N=N,
+        reps=list(reps),
+        steps=steps,
+        block_size=block_size,
+        seed=seed,
+        sample_every=SAMPLE_EVERY,
+        monitor=make_monitor(steps).config(),
+        block_sizes=BLOCK_SIZES,
+        engine=ENGINE_VERSION,
+    )
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def load_cached(cache_dir, key):
+    path = os.path.join(cache_dir, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        results = json.load(f)
+    for result in results:
+        # JSON kennt nur String-Schlüssel
+        result["S_curve"] = {int(l): S for l, S in result["S_curve"].items()}
+    return results
+
+
+def store_cached(cache_dir, key, results):
+    path = os.path.join(cache_dir, f"{key}.json")
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(results, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def compute_blockwise_nematic_order_curve(thetas, positions, block_sizes, size=domain_size):
+    # pro Blockgröße ein bincount über alle Filamente statt einer Maske pro Block:
+    # O(N) je Blockgröße, cos 2θ / sin 2θ werden nur einmal gerechnet
+    cos2 = np.cos(2 * thetas)
+    sin2 = np.sin(2 * thetas)
+    S_curve = []
+    for l in block_sizes:
+        n_blocks = int(size // l)
+        ij = np.floor(positions / l).astype(int)
+        inside = np.all((ij >= 0) & (ij < n_blocks), axis=1)
+        block = ij[inside, 0] * n_blocks + ij[inside, 1]
+        counts = np.bincount(block, minlength=n_blocks ** 2)
+        sum_cos = np.bincount(block, weights=cos2[inside], minlength=n_blocks ** 2)
+        sum_sin = np.bincount(block, weights=sin2[inside], minlength=n_blocks ** 2)
+        # wie bisher zählen nur Blöcke mit mindestens zwei Filamenten
+        used = counts > 1
+        S_blocks = np.hypot(sum_cos[used], sum_sin[used]) / counts[used]
+        S_curve.append(np.mean(S_blocks) if used.any() else 0.0)
+    return np.array(S_curve)
+
+
+def compute_blockwise_nematic_order(thetas, positions, l=10, size=domain_size):
+    return compute_blockwise_nematic_order_curve(thetas, positions, [l], size)[0]
 
 
 # def plot_order_vs_density(N_values, steps=1000, block_size=10):
@@ -181,34 +206,238 @@ def compute_blockwise_nematic_order(filaments, l=10):
 #     plt.tight_layout()
 #     plt.show()
 
-def plot_order_vs_density(N_values, steps=1000, block_size=10, repeats=5):
+def run_replicas(N, steps, block_size, seed, replicas=1, checkpoint=None, trajectory=None,
+                 overrides=None, timer=None):
+    # vorhandener Checkpoint -> dort weiterrechnen (auch um steps zu verlängern)
+    if checkpoint is not None and os.path.exists(checkpoint):
+        ensemble = FilamentEnsemble.load_checkpoint(checkpoint)
+    else:
+        ensemble = make_ensemble(N, rng=seed, replicas=replicas, **(overrides or {}))
+    if timer is not None:
+        ensemble.timer = timer
+    # S(t) jeder Replika laufend mitteln; steps ist nur noch die Obergrenze,
+    # ein Job hört auf, sobald alle Replikas eingeschwungen sind und ihr
+    # Fehlerbalken unter TARGET_ERROR liegt
+    monitors = [make_monitor(steps) for _ in range(ensemble.replicas)]
+    if ensemble.checkpoint_extra is not None:
+        for monitor, state in zip(monitors, ensemble.checkpoint_extra["monitors"]):
+            monitor.load_dict(state)
+    recorder = None
+    if trajectory is not None:
+        recorder = TrajectoryRecorder(trajectory, ensemble, segment_stride=RECORD_SEGMENT_STRIDE)
+
+    def save():
+        if recorder is not None:
+            recorder.flush()
+        ensemble.save_checkpoint(checkpoint, extra={"monitors": [m.to_dict() for m in monitors]})
+
+    while ensemble.step_count < steps and not all(m.done for m in monitors):
+        ensemble.step()
+        if ensemble.step_count % SAMPLE_EVERY == 0:
+            with ensemble.timer("order_parameter"):
+                thetas = ensemble.per_replica(ensemble.theta)
+                heads = ensemble.per_replica(ensemble.heads)
+                for monitor, t, h in zip(monitors, thetas, heads):
+                    monitor.add(compute_blockwise_nematic_order(
+                        t, h, l=block_size, size=ensemble.domain_size))
+        if recorder is not None and ensemble.step_count % RECORD_EVERY == 0:
+            recorder.append(ensemble)
+        if checkpoint is not None and ensemble.step_count % CHECKPOINT_EVERY == 0:
+            save()
+    if checkpoint is not None:
+        save()
+    if recorder is not None:
+        recorder.close()
+
+    thetas = ensemble.per_replica(ensemble.theta)
+    heads = ensemble.per_replica(ensemble.heads)
+    results = []
+    for monitor, t, h in zip(monitors, thetas, heads):
+        S_curve = compute_blockwise_nematic_order_curve(t, h, BLOCK_SIZES,
+                                                         size=ensemble.domain_size)
+        stats = monitor.summary()
+        results.append({
+            "N": N,
+            # Zeitmittel nach der Einschwingphase (nie erkannt: über die
+            # zweite Hälfte des Laufs); ohne jede Probe der Wert am Ende
+            "S": float(stats["mean"]) if stats["samples"] > 0
+                 else float(compute_blockwise_nematic_order(t, h, l=block_size,
+                                                            size=ensemble.domain_size)),
+            "S_err": float(stats["error"]),
+            "tau": float(stats["tau"]) * SAMPLE_EVERY,
+            "equilibrated": stats["equilibrated_at"] is not None,
+            "steps": ensemble.step_count,
+            "S_curve": dict(zip(BLOCK_SIZES, S_curve.tolist())),
+            "rebuilds": ensemble.neighbor_rebuilds,
+        })
+    return results
+
+
+def run_replicas_timed(*args):
+    # wie run_replicas, gibt zusätzlich die Zeiten pro Phase zurück (für den Prozesspool)
+    timer = PhaseTimer(enabled=True)
+    return run_replicas(*args, timer=timer), timer.to_dict()
+
+
+def parameter_grid(**axes):
+    """Alle Kombinationen, z.B. parameter_grid(N=[100, 200], slide_probability=[0.02, 0.04])."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def latin_hypercube(n_points, seed=None, **ranges):
+    """n_points Punkte als Latin Hypercube über ranges = {name: (min, max)}; N wird gerundet."""
+    names = list(ranges)
+    lower, upper = zip(*ranges.values())
+    sample = qmc.scale(qmc.LatinHypercube(d=len(names), rng=seed).random(n_points), lower, upper)
+    points = []
+    for row in sample:
+        point = dict(zip(names, row.tolist()))
+        if "N" in point:
+            point["N"] = int(round(point["N"]))
+        points.append(point)
+    return points
+
+
+def point_tag(overrides):
+    # kurzer, stabiler Name für die Parameter eines Punkts (leer ohne Overrides)
+    if not overrides:
+        return ""
+    return hashlib.sha256(json.dumps(overrides, sort_keys=True).encode()).hexdigest()[:8]
+
+
+def run_parameter_sweep(points, steps=1000, block_size=10, repeats=5, seed=None, workers=None,
+                        checkpoint_dir=None, trajectory_dir=None, cache_dir=None, timer=None):
+    """Rechnet jeden Punkt (dict mit N und beliebigen FilamentEnsemble-Parametern) repeats Mal.
+
+    Die Jobs werden nach Aufwand (N x Replikas) absteigend eingereiht, damit
+    die großen Systeme nicht als Nachzügler am Ende allein laufen. Mit einem
+    PhaseTimer werden die Zeiten aller gerechneten (nicht gecachten) Jobs summiert.
+    """
+    for point in points:
+        unknown = set(point) - set(PARAMS) - {"N"}
+        if unknown:
+            raise TypeError(f"unbekannte Parameter: {sorted(unknown)}")
+    jobs = []
+    for point in points:
+        N = point["N"]
+        overrides = {name: value for name, value in point.items() if name != "N"}
+        if N < BATCH_REPLICAS_BELOW:
+            jobs.extend(
+                (N, overrides, tuple(range(first, min(first + BATCH_REPLICAS, repeats))))
+                for first in range(0, repeats, BATCH_REPLICAS)
+            )
+        else:
+            jobs.extend((N, overrides, (rep,)) for rep in range(repeats))
+    jobs.sort(key=lambda job: job[0] * len(job[2]), reverse=True)
+    # jeder Job bekommt einen eigenen Zufallsstrom, der nur von seed, dem Punkt
+    # und der ersten Wiederholung abhängt -> gleiche seed = gleiche Ergebnisse,
+    # auch wenn die Punkte oder repeats später erweitert werden
+    seeds = [
+        np.random.SeedSequence(seed, spawn_key=(N, reps[0]) + ((int(point_tag(overrides), 16),) if overrides else ()))
+        for N, overrides, reps in jobs
+    ]
+    names = [f"N{N}{'_' + point_tag(overrides) if overrides else ''}_rep{reps[0]}-{reps[-1]}"
+             for N, overrides, reps in jobs]
+    # ein checkpoint_dir gehört zu genau einem Sweep (gleiche seed/Punkte/repeats)
+    checkpoints = [None] * len(jobs)
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        checkpoints = [os.path.join(checkpoint_dir, f"{name}.npz") for name in names]
+    trajectories = [None] * len(jobs)
+    if trajectory_dir is not None:
+        trajectories = [os.path.join(trajectory_dir, name) for name in names]
+    keys = [None] * len(jobs)
+    if cache_dir is not None and seed is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        keys = [job_key(N, reps, steps, block_size, seed, overrides) for N, overrides, reps in jobs]
+    results = []
+
+    def collect(job, job_results, source):
+        N, overrides, reps = job
+        for rep, result in zip(reps, job_results):
+            # Parameter vorne, damit die Tabelle "tidy" lesbar ist
+            result = {"N": N, **overrides, "repeat": rep, **result}
+            results.append(result)
+            label = ", ".join(
+                f"{name} = {value:.4g}" if isinstance(value, float) else f"{name} = {value}"
+                for name, value in overrides.items()
+            )
+            print(
+                f"[{len(results)}/{len(points) * repeats}] N = {N}{', ' + label if label else ''}, "
+                f"Wiederholung {rep}: "
+                f"S = {result['S']:.3f} ± {result['S_err']:.3f} nach {result['steps']} Schritten, "
+                f"Nachbarlisten neu gebaut: {result['rebuilds']}{source}"
+            )
+
+    pending = []
+    for job, job_seed, ckpt, traj, key in zip(jobs, seeds, checkpoints, trajectories, keys):
+        cached = load_cached(cache_dir, key) if key is not None else None
+        if cached is not None:
+            collect(job, cached, " (aus dem Cache)")
+        else:
+            pending.append((job, job_seed, ckpt, traj, key))
+    run = run_replicas if timer is None else run_replicas_timed
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run, N, steps, block_size, job_seed, len(reps), ckpt, traj, overrides):
+                ((N, overrides, reps), key)
+            for (N, overrides, reps), job_seed, ckpt, traj, key in pending
+        }
+        for future in as_completed(futures):
+            job, key = futures[future]
+            job_results = future.result()
+            if timer is not None:
+                job_results, timings = job_results
+                timer.merge(timings)
+            if key is not None:
+                store_cached(cache_dir, key, job_results)
+            collect(job, job_results, "")
+    return results
+
+
+def run_sweep(N_values, steps=1000, block_size=10, repeats=5, seed=None, workers=None,
+              checkpoint_dir=None, trajectory_dir=None, cache_dir=None, timer=None):
+    return run_parameter_sweep([{"N": N} for N in N_values], steps, block_size, repeats, seed=seed,
+                               workers=workers, checkpoint_dir=checkpoint_dir,
+                               trajectory_dir=trajectory_dir, cache_dir=cache_dir, timer=timer)
+
+
+def write_results_table(results, path):
+    """Eine Zeile pro Lauf (Punkt x Wiederholung), S(l) als Spalten S_l5, S_l10, ...
+
+    Jede Zeile enthält alle Engine-Parameter mit dem tatsächlich benutzten Wert,
+    auch wenn der Punkt ihn nicht selbst gesetzt hat, dazu die Dichte ρ
+    [Filamente / mm²] aus der jeweils eigenen Boxgröße.
+    """
+    params = {**PARAMS, **ensemble_params()}
+    rows = []
+    for result in results:
+        row = {"N": result["N"]}
+        row.update({name: result.get(name, default) for name, default in params.items()})
+        row["rho"] = result["N"] / (row["domain_size"] / 1000) ** 2
+        row.update({name: value for name, value in result.items()
+                    if name not in row and name != "S_curve"})
+        row.update({f"S_l{l}": S for l, S in result["S_curve"].items()})
+        rows.append(row)
+    columns = list(dict.fromkeys(name for row in rows for name in row))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot_order_vs_density(N_values, steps=1000, block_size=10, repeats=5, seed=None, workers=None,
+                          checkpoint_dir=None, trajectory_dir=None, cache_dir=None, timer=None):
+    results = run_sweep(N_values, steps, block_size, repeats, seed=seed, workers=workers,
+                        checkpoint_dir=checkpoint_dir, trajectory_dir=trajectory_dir,
+                        cache_dir=cache_dir, timer=timer)
+
     densities = []
     S_means = []
     S_stds = []
-
     for N in N_values:
-        print(f"Simuliere N = {N} ({repeats} Wiederholungen)...")
-        S_repeat = []
-
-        for rep in range(repeats):
-            filaments = [Filament() for _ in range(N)]
-
-            for frame in range(steps):
-                positions = np.array([f.points[0] for f in filaments])
-                tree = cKDTree(positions)
-                for f in filaments:
-                    neighbors_idx = tree.query_ball_point(f.points[0], r=SLIDE_DISTANCE)
-                    neighbors = [filaments[i] for i in neighbors_idx if i != filaments.index(f)]
-                    neighbors_theta = np.array([n.theta for n in neighbors])
-                    # alignment_force = -0.02 * lebwohl_lasher_force(f.theta, neighbors_theta)
-                    alignment_strength = 0.02
-                    alignment_raw = lebwohl_lasher_force(f.theta, neighbors_theta)
-                    alignment_force = alignment_strength * alignment_raw
-                    slide_velocity = calculate_slide_velocity(f, neighbors)
-                    f.update(alignment_force=alignment_force, slide_velocity=slide_velocity)
-
-            S_mean = compute_blockwise_nematic_order(filaments, l=block_size)
-            S_repeat.append(S_mean)
+        S_repeat = [r["S"] for r in results if r["N"] == N]
 
         # Dichte berechnen (gleich für alle Wiederholungen)
         area_mm2 = (domain_size / 1000) ** 2
@@ -232,5 +461,22 @@ def plot_order_vs_density(N_values, steps=1000, block_size=10, repeats=5):
     plt.show()
 
 
-N_values = [50, 100, 150, 200, 250, 300, 400, 500]
-plot_order_vs_density(N_values=N_values, steps=1000, block_size=10)
+if __name__ == "__main__":
+    # Phasendiagramm statt Dichte-Scan, z.B.:
+    #   points = parameter_grid(N=[100, 300], slide_probability=[0.01, 0.04, 0.1],
+    #                           alignment_strength=[0.01, 0.02, 0.05])
+    #   write_results_table(run_parameter_sweep(points, seed=SEED, cache_dir=CACHE_DIR),
+    #                       "phasendiagramm.csv")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--timing", action="store_true", help="Zeit pro Phase messen")
+    parser.add_argument("--timing-json", default=None, help="Zeiten als JSON speichern")
+    args = parser.parse_args()
+    timer = PhaseTimer(enabled=True) if args.timing or args.timing_json else None
+
+    N_values = [50, 100, 150, 200, 250, 300, 400, 500]
+    plot_order_vs_density(N_values=N_values, steps=1000, block_size=10, seed=SEED,
+                          cache_dir=CACHE_DIR, timer=timer)
+    if timer is not None:
+        print(timer.table())
+        if args.timing_json:
+            timer.write_json(args.timing_json)
@@ -0,0 +1,69 @@
+import json
+import time
+from contextlib import nullcontext
+
+# Wandzeit pro Phase eines Schritts (Nachbarsuche, Alignment, ...). Mit
+# enabled=False liefert timer(name) immer denselben nullcontext, das kostet
+# praktisch nichts und kann deshalb immer im Code stehen bleiben.
+
+_NOT_TIMED = nullcontext()
+
+
+class _Phase:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+
+
+class PhaseTimer:
+    """Summiert Aufrufe und Zeit pro Phase: `with timer("neighbors"): ...`."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.totals = {}
+        self.calls = {}
+
+    def __call__(self, name):
+        return _Phase(self, name) if self.enabled else _NOT_TIMED
+
+    def add(self, name, seconds, calls=1):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def merge(self, state):
+        """Addiert das to_dict() eines anderen Timers (z.B. aus einem Worker)."""
+        for name, entry in state.items():
+            self.add(name, entry["total_s"], entry["calls"])
+
+    def to_dict(self):
+        return {
+            name: dict(calls=self.calls[name], total_s=total)
+            for name, total in self.totals.items()
+        }
+
+    def table(self):
+        total = sum(self.totals.values())
+        lines = [
+            f"{'Phase':<16}{'Aufrufe':>10}{'gesamt [s]':>12}"
+            f"{'pro Aufruf [ms]':>17}{'Anteil':>9}"
+        ]
+        for name, seconds in sorted(self.totals.items(), key=lambda kv: -kv[1]):
+            calls = self.calls[name]
+            share = seconds / total if total else 0.0
+            lines.append(
+                f"{name:<16}{calls:>10}{seconds:>12.3f}"
+                f"{1e3 * seconds / calls:>17.3f}{share:>9.1%}"
+            )
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,167 @@
+import json
+import os
+
+import numpy as np
+
+# Trajektorien als Ordner mit meta.json und Chunk-Dateien
+#   step_00000.npy      (chunk,)
+#   heads_00000.npy     (chunk, N, 2)
+#   theta_00000.npy     (chunk, N)
+#   segments_00000.npy  (chunk, N, n_segments // segment_stride, 2)   optional
+# Geschrieben wird immer nur in den aktuellen Chunk (memory-mapped), der
+# Speicherbedarf hängt also nicht von der Länge des Laufs ab.
+
+
+class TrajectoryRecorder:
+    """Hängt Frames eines FilamentEnsemble an einen Trajektorien-Ordner an.
+
+    Existiert der Ordner schon, wird weitergeschrieben; Frames nach dem
+    aktuellen step_count des Ensembles (z.B. nach Resume von einem älteren
+    Checkpoint) werden dabei verworfen. Passen Filamentzahl, Replikas,
+    Segmente, chunk_size oder segment_stride nicht zu den gespeicherten,
+    gibt es einen ValueError.
+    """
+
+    def __init__(self, path, ensemble, chunk_size=256, segment_stride=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            self._check_meta(
+                n=ensemble.n,
+                replicas=ensemble.replicas,
+                n_segments=ensemble.n_segments,
+                chunk_size=chunk_size,
+                segment_stride=segment_stride,
+            )
+        else:
+            self.meta = dict(
+                n=ensemble.n,
+                replicas=ensemble.replicas,
+                n_segments=ensemble.n_segments,
+                chunk_size=chunk_size,
+                segment_stride=segment_stride,
+                frames=0,
+                last_step=-1,
+            )
+        self.chunk = None
+        self.chunk_index = None
+        self._truncate_after(ensemble.step_count)
+
+    def _check_meta(self, **expected):
+        # Weiterschreiben nur in eine Trajektorie mit gleichem Layout
+        mismatch = [
+            f"{name} = {self.meta[name]} (jetzt {value})"
+            for name, value in expected.items()
+            if self.meta[name] != value
+        ]
+        if mismatch:
+            raise ValueError(
+                f"Trajektorie {self.path} passt nicht zu diesem Lauf: "
+                + ", ".join(mismatch)
+            )
+
+    @property
+    def shapes(self):
+        n, chunk = self.meta["n"], self.meta["chunk_size"]
+        shapes = dict(step=(chunk,), heads=(chunk, n, 2), theta=(chunk, n))
+        if self.meta["segment_stride"]:
+            kept = len(range(0, self.meta["n_segments"], self.meta["segment_stride"]))
+            shapes["segments"] = (chunk, n, kept, 2)
+        return shapes
+
+    def _file(self, name, index):
+        return os.path.join(self.path, f"{name}_{index:05d}.npy")
+
+    def _truncate_after(self, step):
+        frames = self.meta["frames"]
+        if frames == 0 or self.meta["last_step"] <= step:
+            return
+        steps = TrajectoryReader(self.path).read("step")
+        self.meta["frames"] = int(np.searchsorted(steps, step, side="right"))
+        self.meta["last_step"] = (
+            int(steps[self.meta["frames"] - 1]) if self.meta["frames"] else -1
+        )
+        self._write_meta()
+
+    def _open_chunk(self, index):
+        self.flush()
+        self.chunk = {}
+        for name, shape in self.shapes.items():
+            file = self._file(name, index)
+            if os.path.exists(file):
+                self.chunk[name] = np.load(file, mmap_mode="r+")
+            else:
+                dtype = np.int64 if name == "step" else np.float32
+                self.chunk[name] = np.lib.format.open_memmap(
+                    file, mode="w+", dtype=dtype, shape=shape
+                )
+        self.chunk_index = index
+
+    def append(self, ensemble):
+        index, row = divmod(self.meta["frames"], self.meta["chunk_size"])
+        if index != self.chunk_index:
+            self._open_chunk(index)
+        self.chunk["step"][row] = ensemble.step_count
+        self.chunk["heads"][row] = ensemble.heads
+        self.chunk["theta"][row] = ensemble.theta
+        if "segments" in self.chunk:
+            self.chunk["segments"][row] = ensemble.points[
+                :, :: self.meta["segment_stride"]
+            ]
+        self.meta["frames"] += 1
+        self.meta["last_step"] = ensemble.step_count
+        if row == self.meta["chunk_size"] - 1:
+            self.flush()
+
+    def flush(self):
+        if self.chunk is not None:
+            for array in self.chunk.values():
+                array.flush()
+            self.chunk = None
+            self.chunk_index = None
+        self._write_meta()
+
+    def _write_meta(self):
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    close = flush
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryReader:
+    """Liest beliebige Frame-Bereiche, ohne die ganze Trajektorie zu laden."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+    def __len__(self):
+        return self.meta["frames"]
+
+    def read(self, name, start=0, stop=None):
+        stop = len(self) if stop is None else min(stop, len(self))
+        chunk_size = self.meta["chunk_size"]
+        parts = []
+        for index in range(start // chunk_size, (stop - 1) // chunk_size + 1):
+            if start >= stop:
+                break
+            file = os.path.join(self.path, f"{name}_{index:05d}.npy")
+            data = np.load(file, mmap_mode="r")
+            lo = max(start - index * chunk_size, 0)
+            hi = min(stop - index * chunk_size, chunk_size)
+            parts.append(np.array(data[lo:hi]))
+        if not parts:
+            return np.empty((0,))
+        return np.concatenate(parts)
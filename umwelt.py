@@ -1,8 +1,15 @@
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
-from scipy.spatial import cKDTree
-from scipy.interpolate import splprep, splev
+from filament_engine import FilamentEnsemble
+from filament_render import (
+    CurveSmoother,
+    DrawTimer,
+    FilamentRenderer,
+    spline_matrix,
+    unwrap_and_plot,
+)
 
 # Universal Parameter
 N = 50
@@ -15,7 +22,10 @@ dt = 0.5  # Zeitschritt
 domain_size = 100
 n_segments = 30
 filament_length = 15
-segment_length = filament_length / n_segments
+# "walls" = harte Wände, "periodic" = periodische Box ohne Randeffekte
+BOUNDARY = "walls"
+# Seed für den Zufallsgenerator (None = jedes Mal anders)
+SEED = None
 
 # Sliding Parameter 
 ## Hier ist vermutlich sehr viel falsch bzw. basiert auf Annahmen ####
@@ -25,87 +35,37 @@ SLIDE_VELOCITY = 1.5
 ANGLE_PARALLEL_THRESHOLD = np.pi / 4
 ANGLE_ANTIPARALLEL_THRESHOLD = 3 * np.pi / 4
 
-class Filament:
-    def __init__(self):
-        self.v = v0_mean
-        self.theta = np.random.uniform(0, 2 * np.pi)
-        self.polarity = 1
-        self.reversal_rate = 0.01
-        dx, dy = np.cos(self.theta), np.sin(self.theta)
-        margin = filament_length + 5
-        start = np.random.rand(2) * (domain_size - 2 * margin) + margin
-
-        self.points = np.array([
-            start - i * segment_length * np.array([dx, dy])
-            for i in range(n_segments)
-        ])
-
-        self.is_stuck = False
-        self.stuck_to = None
-        self.stuck_direction = 0
-
-    #### No short cuts für  den Speed run #######
-    def reflect_if_out_of_bounds(self):
-        x, y = self.points[0]
-        if x < 0:
-            x = 0
-            self.theta = np.pi - self.theta
-        elif x > domain_size:
-            x = domain_size
-            self.theta = np.pi - self.theta
-        if y < 0:
-            y = 0
-            self.theta = -self.theta
-        elif y > domain_size:
-            y = domain_size
-            self.theta = -self.theta
-        self.theta %= 2 * np.pi
-        self.points[0] = np.array([x, y])
-    
-    #####  BEWEGUNG der Spaghetti. Hier wird auch geregelt, dass die Spaghetti nicht den Kochtopf verlässt ######
-    def update(self, alignment_force=0, slide_velocity=np.array([0.0, 0.0])):
-        if np.random.rand() < self.reversal_rate * dt:
-            self.polarity *= -1
-
-        noise = np.sqrt(2 * D_omega * dt) * np.random.normal()
-        self.theta += noise - 0.02 * alignment_force
-        self.theta %= 2 * np.pi
-
-        move_dir = np.array([np.cos(self.theta), np.sin(self.theta)])
-        speed = self.v  # konstante Geschwindigkeit
-        self.points[0] += (speed * self.polarity * move_dir + slide_velocity) * dt
-
-        for i in range(1, n_segments):
-            vec = self.points[i] - self.points[i - 1]
-            dist = np.linalg.norm(vec)
-            if dist > 1e-8:
-                diff = (dist - segment_length) / dist * vec
-                self.points[i] -= 0.5 * diff
-
-        self.reflect_if_out_of_bounds()
-
 ### S = cos(2\theta) #####
-def compute_global_nematic_order(filaments):
-    thetas = np.array([f.theta for f in filaments])
+def compute_global_nematic_order(thetas):
     return np.mean(np.cos(2 * thetas))
 
-def unwrap_and_plot(points, box_size):
-    points = np.copy(points)
-    for i in range(1, len(points)):
-        delta = points[i] - points[i - 1]
-        delta = (delta + box_size / 2) % box_size - box_size / 2
-        points[i] = points[i - 1] + delta
-    return points
-
-#### Beauty and the beast ##### no but for real I just want something beautiful
-def smooth_points(points, smoothness=0):
-    x, y = points[:, 0], points[:, 1]
-    tck, u = splprep([x, y], s=smoothness)
-    unew = np.linspace(0, 1, 100)
-    out = splev(unew, tck)
-    return np.vstack(out).T
-
-filaments = [Filament() for _ in range(N)]
+# eine feste Glättungsmatrix für alle Filamente (n_segments ist konstant)
+smooth_points = CurveSmoother(spline_matrix(n_segments, n_out=100))
+
+#### Die Spaghetti-Physik steckt jetzt in filament_engine.py ####
+# Alignment wie bisher: update() rechnet -0.02 * F, Filament.update zog davon
+# nochmal 0.02 * alignment ab -> effektiv +0.02 * 0.02 * F
+def ensemble_params():
+    return dict(
+        v0=v0_mean,
+        D_omega=D_omega,
+        dt=dt,
+        domain_size=domain_size,
+        n_segments=n_segments,
+        filament_length=filament_length,
+        chain="relax",
+        boundary=BOUNDARY,
+        heading_smoothing=1.0,
+        alignment_strength=0.02 * 0.02,
+        slide_probability=SLIDE_PROBABILITY,
+        slide_distance=SLIDE_DISTANCE,
+        slide_velocity=SLIDE_VELOCITY,
+        angle_parallel_threshold=ANGLE_PARALLEL_THRESHOLD,
+        angle_antiparallel_threshold=ANGLE_ANTIPARALLEL_THRESHOLD,
+    )
+
+
+ensemble = FilamentEnsemble(N, rng=SEED, **ensemble_params())
 
 
 ##### alles für den Plot #######
@@ -115,88 +75,37 @@ ax.set_ylim(0, domain_size)
 ax.set_aspect("equal")
 ax.set_title("Simulation aktiver Filamente mit Sliding-Geschwindigkeitsänderung")
 
-lines = [ax.plot([], [], lw=2, alpha=0.4)[0] for _ in range(VISIBLE)]
+renderer = FilamentRenderer(ax, VISIBLE)
 text = ax.text(5, 5, "", color="red")
-
-def calculate_slide_velocity(filament, neighbors):
-    slide_velocity = np.array([0.0, 0.0])
-
-    if filament.is_stuck:
-        other = filament.stuck_to
-        direction = filament.stuck_direction
-        move_dir = np.array([np.cos(other.theta), np.sin(other.theta)])
-        return direction * SLIDE_VELOCITY * move_dir
-
-    for other in neighbors:
-        if other is filament:
-            continue
-
-        vec = other.points[0] - filament.points[0]
-        dist = np.linalg.norm(vec)
-        if dist > SLIDE_DISTANCE:
-            continue
-
-        if np.random.rand() < SLIDE_PROBABILITY:
-            theta1 = filament.theta % (2 * np.pi)
-            theta2 = other.theta % (2 * np.pi)
-            dtheta = abs((theta1 - theta2 + np.pi) % (2 * np.pi) - np.pi)
-
-            if dtheta < ANGLE_PARALLEL_THRESHOLD:
-                direction = 1
-            elif dtheta > ANGLE_ANTIPARALLEL_THRESHOLD:
-                direction = -1
-            else:
-                continue
-
-            filament.is_stuck = True
-            filament.stuck_to = other
-            filament.stuck_direction = direction
-            move_dir = np.array([np.cos(other.theta), np.sin(other.theta)])
-            slide_velocity += direction * SLIDE_VELOCITY * move_dir
-            break
-
-    return slide_velocity
-
-
-#### Lebwoh-Lasher-Potential    #######
-def lebwohl_lasher_force(theta_i, neighbors_theta):
-    if len(neighbors_theta) == 0:
-        return 0.0
-    diffs = theta_i - neighbors_theta
-    return 2 * np.mean(np.sin(2 * diffs))
-
+# set_segments ist nur die Vorbereitung, gezeichnet wird nach update()
+drawing = DrawTimer(fig.canvas, ensemble.timer)
 
 #### Update Schleife ####### check: Lebwohl, slide, checking for neighbors
 def update(frame):
-    positions = np.array([f.points[0] for f in filaments])
-    tree = cKDTree(positions)
-
-    alignment_strength = 0.02
-
-    for f in filaments:
-        neighbors_idx = tree.query_ball_point(f.points[0], r=SLIDE_DISTANCE)
-        neighbors = [filaments[i] for i in neighbors_idx if i != filaments.index(f)]
-
-        neighbors_theta = np.array([n.theta for n in neighbors])
-        alignment_force = lebwohl_lasher_force(f.theta, neighbors_theta)
-        alignment = -alignment_strength * alignment_force
-
-        slide_velocity = calculate_slide_velocity(f, neighbors)
-        f.update(alignment_force=alignment, slide_velocity=slide_velocity)
+    ensemble.step()
 
     if frame % 2 == 0:
-        S = compute_global_nematic_order(filaments)
+        with ensemble.timer("order_parameter"):
+            S = compute_global_nematic_order(ensemble.theta)
         text.set_text(f"Nemat. Ordnung S = {S:.2f}")
 
-    for i, f in enumerate(filaments[:VISIBLE]):
-        pts = unwrap_and_plot(f.points, domain_size)
-        smooth_pts = smooth_points(pts, smoothness=1)
-        x, y = smooth_pts[:, 0], smooth_pts[:, 1]
-        color = (0.0, 0.6, 0.0, 0.4)
-        lines[i].set_data(x, y)
-        lines[i].set_color(color)
-
-    return lines + [text]
-
-ani = FuncAnimation(fig, update, frames=500, interval=30, blit=True)
-plt.show()
+    with ensemble.timer("smoothing"):
+        curves = smooth_points(unwrap_and_plot(ensemble.points[:VISIBLE], domain_size))
+        renderer.update(curves)
+
+    drawing.mark()
+    return [renderer.collection, text]
+
+# nur beim direkten Start animieren (movie_export.py importiert das Skript)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--timing", action="store_true", help="Zeit pro Phase messen")
+    parser.add_argument("--timing-json", default=None, help="Zeiten als JSON speichern")
+    args = parser.parse_args()
+    ensemble.timer.enabled = args.timing or args.timing_json is not None
+    ani = FuncAnimation(fig, update, frames=500, interval=30, blit=True)
+    plt.show()
+    if ensemble.timer.enabled:
+        print(ensemble.timer.table())
+        if args.timing_json:
+            ensemble.timer.write_json(args.timing_json)